@@ -1,7 +1,14 @@
 import argparse
-import copy
+import hashlib
+import json
+import os
 import sys
 import re
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import Tuple
 import subprocess
 
@@ -9,7 +16,7 @@ import subprocess
 Changelog generation script, requires PAT with public_repo access, 
 see https://github.com/settings/tokens
 
-usage: changelog [-h] [-e END] [-m {final,beta}] -p PAT [-r REPO] [-s START] [-t TAG]
+usage: changelog [-h] [-e END] [-m {final,beta}] -p PAT [-r REPO] [-s START] [-t TAG] [--no-cache]
 
 Generate Changelogs between tags or commits
 
@@ -27,15 +34,53 @@ optional arguments:
   --start-tag START_TAG 
                         Tag to use as start reference (instead of -s)
   -v, --verbose         Verbose mode
+  --no-cache            Do not use the GitHub response cache (~/.cache/changelog,
+                        entries unused for 30 days are pruned, delete it to clear)
 """
 
 
-final = re.compile(r"^(V(\d)+.(\d)+)$")
-beta = re.compile(r"^(V(\d)+.(\d)+((RC(\d)+)|(DB(\d)+))?)$")
+final = re.compile(r"^(V(\d)+\.(\d)+)$", re.ASCII)
+beta = re.compile(r"^(V(\d)+\.(\d)+((RC(\d)+)|(DB(\d)+))?)$", re.ASCII)
+major_version = re.compile(r"^V(\d+)\.", re.ASCII)
+tag_version = re.compile(r"^V(\d+)\.(\d+)(?:(DB|RC)(\d+))?", re.ASCII)
+# PR number GitHub appends to squash-merge subjects, e.g. "Fix foo (#1234)".
+pr_reference = re.compile(r"\(#(\d+)\)\s*$", re.ASCII)
+
+# Number of aliased lookups sent in a single GraphQL request.
+GRAPHQL_BATCH = 50
+# GraphQL requests in flight at once, kept low for GitHub's secondary rate limits.
+GRAPHQL_WORKERS = 4
+# Remaining requests below which the script waits for the rate limit reset.
+RATE_LIMIT_LOW = 100
+# Commits per compare page; the client-wide per_page of 100 is below the compare default.
+COMPARE_PER_PAGE = 250
+# Only ranges whose newest commit is this recent are matched against the
+# closed-PR listing, which starts at the most recently updated PRs.
+MERGED_PULLS_RECENT = timedelta(days=14)
+# How far before the start commit merged PRs are listed, for PRs merged out of date order.
+MERGED_PULLS_SLACK = timedelta(days=7)
+# Largest value of the GraphQL Int type, larger PR numbers fail the whole query.
+GRAPHQL_INT_MAX = 2**31 - 1
+PULL_FIELDS = "number title url state labels(first: 100) { nodes { name } }"
+
+# One file per URL and page. Entries not used for CACHE_EXPIRY seconds are
+# removed at startup; deleting the directory clears it, --no-cache bypasses it.
+CACHE_DIR = os.path.expanduser("~/.cache/changelog")
+CACHE_EXPIRY = 30 * 24 * 3600
+# Seconds a cached GET response is reused without revalidation, by endpoint.
+# None marks immutable responses, which are never revalidated. Other
+# responses use the max-age sent by GitHub and are revalidated with their
+# ETag once stale; a 304 answer does not count against the rate limit.
+CACHE_TTL = [
+    (re.compile(r"/commits/[0-9a-f]{40}$"), None),
+    (re.compile(r"/compare/[0-9a-f]{40}\.\.\.[0-9a-f]{40}$"), None),
+    (re.compile(r"/git/matching-refs/tags/"), 300),
+]
 
 try:
-    from github import Github, UnknownObjectException
-    from github.Label import Label
+    import requests
+    from requests.adapters import HTTPAdapter
+    from github import Auth, Github, GithubException
     from mdutils import MdUtils
 except BaseException:
     sys.exit("Error: run 'pip install PyGithub mdutils'")
@@ -101,6 +146,9 @@ SECTIONS = {
     "Other": []
 }
 
+LABEL_TO_SECTION = {label: section for section, labels in SECTIONS.items() for label in labels}
+SECTION_ORDER = {section: n for n, section in enumerate(SECTIONS)}
+
 
 class CliArgs:
     def __init__(self) -> dict:
@@ -156,6 +204,12 @@ class CliArgs:
             help="Verbose mode",
             action="store_true"
         )
+        parse.add_argument(
+            '--no-cache',
+            dest='no_cache',
+            help="Do not use the GitHub response cache",
+            action="store_true"
+        )
         options = parse.parse_args()
         self.end = options.end
         self.mode = options.mode
@@ -165,27 +219,136 @@ class CliArgs:
         self.tag = options.tag
         self.verbose = options.verbose
         self.start_tag = options.start_tag
+        self.no_cache = options.no_cache
 
 
 def validate_sha(hash_value: str) -> bool:
     if len(hash_value) != 40:
         return False
     try:
-        sha_int = int(hash_value, 16)
+        int(hash_value, 16)
     except ValueError:
         return False
     return True
 
 
+class ResponseCache:
+    """File-backed cache of GitHub GET responses, keyed by URL and parameters."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.prune()
+
+    def prune(self):
+        """Remove entries not used for CACHE_EXPIRY seconds, the cache has no other size limit."""
+        expiry = time.time() - CACHE_EXPIRY
+        for entry in os.scandir(self.path):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < expiry:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                # Removed or replaced by another run sharing the cache.
+                pass
+
+    def wrap(self, request):
+        def cached_request(verb, url, parameters=None, headers=None, input=None, **kwargs):
+            if verb != "GET":
+                return request(verb, url, parameters=parameters, headers=headers, input=input, **kwargs)
+            entry_path = self.entry_path(url, parameters)
+            entry = self.load(entry_path)
+            if entry and self.fresh(url, entry):
+                self.touch(entry_path)
+                return entry["headers"], entry["data"]
+            headers = dict(headers or {})
+            if entry and entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            response_headers, data = request(
+                verb, url, parameters=parameters, headers=headers, input=input, **kwargs)
+            if entry and data is None:
+                # 304 Not Modified, the cached body is still current.
+                entry["time"] = time.time()
+                self.store(entry_path, entry)
+                return entry["headers"], entry["data"]
+            etag = self.header(response_headers, "etag")
+            if etag:
+                max_age = re.search(r"max-age=(\d+)", self.header(response_headers, "cache-control") or "")
+                self.store(entry_path, {
+                    "etag": etag,
+                    "headers": dict(response_headers),
+                    "data": data,
+                    "time": time.time(),
+                    "max_age": int(max_age.group(1)) if max_age else 0,
+                })
+            return response_headers, data
+        return cached_request
+
+    def entry_path(self, url: str, parameters) -> str:
+        key = json.dumps([url, parameters or {}], sort_keys=True)
+        return os.path.join(self.path, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    @staticmethod
+    def header(headers: dict, name: str):
+        for key, value in headers.items():
+            if key.lower() == name:
+                return value
+        return None
+
+    @staticmethod
+    def fresh(url: str, entry: dict) -> bool:
+        ttl = entry["max_age"]
+        path = url.partition("?")[0]
+        for pattern, endpoint_ttl in CACHE_TTL:
+            if pattern.search(path):
+                if endpoint_ttl is None:
+                    return True
+                ttl = endpoint_ttl
+                break
+        return time.time() - entry["time"] < ttl
+
+    @staticmethod
+    def load(entry_path: str):
+        try:
+            with open(entry_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def touch(entry_path: str):
+        """Mark an entry as used, prune() goes by modification time."""
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            pass
+
+    def store(self, entry_path: str, entry: dict):
+        with tempfile.NamedTemporaryFile("w", dir=self.path, suffix=".tmp", delete=False) as f:
+            json.dump(entry, f)
+        os.replace(f.name, entry_path)
+
+
 class GenerateTree:
     def __init__(self, args):
-        github = Github(args.pat)
+        # A lazy client creates the repository object without fetching it, and
+        # every object built from it shares the requester the cache is installed on.
+        github = Github(auth=Auth.Token(args.pat), per_page=100, lazy=True)
         self.name = args.repo
+        self.requester = github._Github__requester
+        if not args.no_cache:
+            self.requester.requestJsonAndCheck = ResponseCache(CACHE_DIR).wrap(
+                self.requester.requestJsonAndCheck)
         self.repo = github.get_repo(self.name)
+        # GraphQL batches run on worker threads, which do not share the PyGithub
+        # requester; this session mirrors its endpoint, timeout and retries.
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"bearer {args.pat}"
+        if self.requester.kwargs["retry"] is not None:
+            self.session.mount("https://", HTTPAdapter(max_retries=self.requester.kwargs["retry"]))
         self.args = args
         if args.tag:
             self.tag = args.tag
-            self.end = self.repo.get_commit(args.tag).sha
+            self.end = self.commit_sha(args.tag)
             if args.end:
                 print("error: set either --end or --tag")
                 exit(1)
@@ -193,7 +356,7 @@ class GenerateTree:
             if not validate_sha(args.end):
                 print("error: --end argument is not a valid hash")
                 exit(1)
-            self.end = self.repo.get_commit(args.end).sha
+            self.end = self.commit_sha(args.end)
             if not args.start:
                 print("error: --end argument requires --start")
                 exit(1)
@@ -207,7 +370,7 @@ class GenerateTree:
             if not validate_sha(args.start):
                 print("error: --start argument is not a valid hash")
                 exit(1)
-            self.start = self.repo.get_commit(args.start).sha
+            self.start = self.commit_sha(args.start)
         elif args.start_tag:
             self.start = self.select_start_ref(args.start_tag)
         else:
@@ -217,65 +380,161 @@ class GenerateTree:
         self.commits = {}
         self.other_commits = []
         self.excluded = []
-        commits = self.repo.get_commits(sha=self.end)
-
-        # Check if the common ancestor exists in the commit list.
-        found_common_ancestor = False
-        for commit in commits:
-            if commit.sha == self.start:
-                found_common_ancestor = True
-                break
-        if not found_common_ancestor:
+        # get_common_by_tag finds no start when there are fewer than two release tags.
+        if self.start is None:
+            print("error: the common ancestor was not found")
+            exit(1)
+        # Only the commits between start and end are listed, newest first.
+        comparison = self.repo.compare(self.start, self.end, comparison_commits_per_page=COMPARE_PER_PAGE)
+        if comparison.status not in ("ahead", "identical"):
             print("error: the common ancestor was not found")
             exit(1)
+        commits = list(comparison.commits)[::-1]
 
         # Retrieve the complementary information for each commit.
-        for commit in commits:
-            if commit.sha == self.start:
-                break
-            m = commit.commit.message.partition('\n')[0]
-            try:
-                pr_number = int(m[m.rfind('#')+1:m.rfind(')')])
-                pull = self.repo.get_pull(pr_number)
-            except (ValueError, UnknownObjectException):
-                p = commit.get_pulls()
-                if p.totalCount > 0:
-                    pr_number = p[0].number
-                    pull = self.repo.get_pull(pr_number)
-                else:
-                    if args.verbose:
-                        print(f"info: commit has no associated PR {commit.sha}: \"{m}\"")
-                    self.other_commits.append((commit.sha, m))
-                    continue
+        subjects = [commit.commit.message.partition('\n')[0] for commit in commits]
+        since = comparison.base_commit.commit.committer.date - MERGED_PULLS_SLACK
+        pulls = self.fetch_pulls(commits, subjects, since) if commits else {}
+        for commit, m in zip(commits, subjects):
+            pull = pulls.get(commit.sha)
+            if pull is None:
+                if args.verbose:
+                    print(f"info: commit has no associated PR {commit.sha}: \"{m}\"")
+                self.other_commits.append((commit.sha, m))
+                continue
 
-            if pull.state == 'open':
+            if pull["state"] == 'OPEN':
                 if args.verbose:
-                    print(f"info: commit is in tree but only associated with open PR {pr_number}: \"{pull.title}\"")
+                    print(f"info: commit is in tree but only associated with open PR {pull['number']}: \"{pull['title']}\"")
                 self.other_commits.append((commit.sha, m))
                 continue
 
-            if self.excluded_from_changelog(pull.labels):
+            if self.excluded_from_changelog(pull["labels"]):
                 if args.verbose:
-                    print(f"info: the PR {pr_number}: \"{pull.title}\" was excluded from the changelog")
+                    print(f"info: the PR {pull['number']}: \"{pull['title']}\" was excluded from the changelog")
                 self.excluded.append((commit.sha, m))
                 continue
 
-            labels = []
-            for label in pull.labels:
-                labels.append(label.name)
-
-            self.commits[pull.number] = {
-                "Title": pull.title,
-                "Url": pull.html_url,
-                "labels": labels
+            self.commits[pull["number"]] = {
+                "Title": pull["title"],
+                "Url": pull["url"],
+                "labels": pull["labels"]
             }
 
+    def commit_sha(self, ref: str) -> str:
+        """Resolve a ref to its commit sha; lazy objects would otherwise echo the ref back."""
+        return self.repo.get_commit(ref).complete().sha
+
+    def fetch_pulls(self, commits, subjects, since) -> dict:
+        """Map each commit sha to its PR, using as few requests as possible.
+
+        The PR number is taken from the commit subject when present. When the
+        range ends recently, commits without one are first matched by merge
+        commit against a bounded listing of PRs merged since `since`; the
+        listing starts at the latest PRs, so older ranges would not be found
+        in it. Subject numbers and the
+        remaining commits (via the first associated PR) are resolved with
+        batched GraphQL queries.
+        """
+        pulls = {}
+        by_number = {}
+        pending = []
+        for commit, m in zip(commits, subjects):
+            matched_pr = pr_reference.search(m)
+            if matched_pr and 0 < int(matched_pr.group(1)) <= GRAPHQL_INT_MAX:
+                by_number[commit.sha] = int(matched_pr.group(1))
+            else:
+                pending.append(commit.sha)
+
+        newest = commits[0].commit.committer.date
+        if pending and datetime.now(timezone.utc) - newest < MERGED_PULLS_RECENT:
+            # Two listed PRs per commit cost no more pages than the GraphQL
+            # batches they can save.
+            merged = self.merged_pulls(since, limit=2 * len(pending))
+            pulls.update((sha, merged[sha]) for sha in pending if sha in merged)
+            pending = [sha for sha in pending if sha not in pulls]
+
+        results = self.graphql_batch(
+            [f"pullRequest(number: {pr_number}) {{ {PULL_FIELDS} }}" for pr_number in by_number.values()])
+        for sha, pull in zip(by_number, results):
+            if pull:
+                pulls[sha] = self.pull_info(pull)
+            else:
+                pending.append(sha)
+
+        results = self.graphql_batch(
+            [f"object(oid: \"{sha}\") {{ ... on Commit {{ associatedPullRequests(first: 1) "
+             f"{{ nodes {{ {PULL_FIELDS} }} }} }} }}" for sha in pending])
+        for sha, obj in zip(pending, results):
+            nodes = obj["associatedPullRequests"]["nodes"] if obj else []
+            if nodes:
+                pulls[sha] = self.pull_info(nodes[0])
+        return pulls
+
+    def merged_pulls(self, since, limit: int) -> dict:
+        """Index the PRs merged since `since` by their merge commit sha, listing at most `limit` PRs."""
+        pulls = {}
+        for n, pull in enumerate(self.repo.get_pulls(state='closed', sort='updated', direction='desc')):
+            # Merging updates a PR, so older updates cannot belong to the range.
+            if n >= limit or pull.updated_at < since:
+                break
+            if pull.merged_at:
+                pulls[pull.merge_commit_sha] = {
+                    "number": pull.number,
+                    "title": pull.title,
+                    "url": pull.html_url,
+                    "state": "MERGED",
+                    "labels": [label.name for label in pull.labels]
+                }
+        return pulls
+
     @staticmethod
-    def excluded_from_changelog(labels: list[Label]) -> bool:
-        for label in labels:
-            if label.name == 'exclude from changelog':
-                return True
-        return False
+    def pull_info(pull: dict) -> dict:
+        """Flatten a PULL_FIELDS node; label names come from the same response, no extra request."""
+        return {**pull, "labels": [label["name"] for label in pull["labels"]["nodes"]]}
+
+    def graphql_batch(self, selections: list[str]) -> list:
+        """Resolve repository-level GraphQL selections, GRAPHQL_BATCH per request.
+
+        The requests run on a small thread pool; results keep the order of selections.
+        """
+        chunks = [selections[i:i + GRAPHQL_BATCH] for i in range(0, len(selections), GRAPHQL_BATCH)]
+        with ThreadPoolExecutor(max_workers=GRAPHQL_WORKERS) as executor:
+            return [result for chunk in executor.map(self.graphql_query, chunks) for result in chunk]
+
+    def graphql_query(self, selections: list[str]) -> list:
+        owner, name = self.name.split("/", 1)
+        aliases = " ".join(f"a{n}: {selection}" for n, selection in enumerate(selections))
+        query = ("query($owner: String!, $name: String!) "
+                 f"{{ repository(owner: $owner, name: $name) {{ {aliases} }} }}")
+        response = self.session.post(
+            self.requester.graphql_url,
+            json={"query": query, "variables": {"owner": owner, "name": name}},
+            timeout=self.requester.kwargs["timeout"])
+        response.raise_for_status()
+        self.wait_for_rate_limit(response.headers)
+        result = response.json()
+        # Unknown PR numbers or commits come back as NOT_FOUND for their alias
+        # only; anything else (rate limit, token scope, ...) must not look like
+        # commits without a PR.
+        errors = [error for error in result.get("errors") or [] if error.get("type") != "NOT_FOUND"]
+        if errors:
+            raise GithubException(response.status_code, result, dict(response.headers))
+        repository = (result.get("data") or {}).get("repository") or {}
+        return [repository.get(f"a{n}") for n in range(len(selections))]
+
+    def wait_for_rate_limit(self, headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None or int(remaining) >= RATE_LIMIT_LOW:
+            return
+        delay = max(0, int(headers.get("X-RateLimit-Reset", 0)) - time.time())
+        if self.args.verbose:
+            print(f"info: {remaining} GitHub API requests left, waiting {delay:.0f}s for the rate limit reset")
+        time.sleep(delay)
+
+    @staticmethod
+    def excluded_from_changelog(labels: list[str]) -> bool:
+        return 'exclude from changelog' in labels
 
     def get_common_ancestor(self, start_tag: str) -> str:
         print("info: will look for the common ancestor by local git repo")
@@ -301,51 +560,80 @@ class GenerateTree:
             print("info: found common ancestor: " + common_ancestor)
         return common_ancestor
 
+    def get_tag_names(self) -> list[str]:
+        """Names of the release tags, newest first, from a single refs request."""
+        _, refs = self.requester.requestJsonAndCheck(
+            "GET", f"/repos/{self.name}/git/matching-refs/tags/V")
+        names = [ref["ref"].removeprefix("refs/tags/") for ref in refs]
+        return sorted(names, key=self.version_key, reverse=True)
+
+    @staticmethod
+    def version_key(name: str) -> tuple:
+        matched = tag_version.match(name)
+        if not matched:
+            return 0, 0, 0, 0
+        major, minor, stage, number = matched.groups()
+        # Final releases come after their release candidates, which come after dev builds.
+        stage_order = {"DB": 0, "RC": 1, None: 2}[stage]
+        return int(major), int(minor), stage_order, int(number or 0)
+
     def get_common_by_tag(self, mode) -> str:
         tags = []
         found_end_tag = False
-        for tag in self.repo.get_tags():
-            if not found_end_tag and tag.name == self.tag:
+        for tag in self.get_tag_names():
+            if not found_end_tag and tag == self.tag:
                 found_end_tag = True
             if found_end_tag:
                 if mode == "final":
-                    matched_tag = final.match(tag.name)
+                    matched_tag = final.match(tag)
                 else:
-                    matched_tag = beta.match(tag.name)
+                    matched_tag = beta.match(tag)
                 if matched_tag:
                     tags.append(tag)
+                    # Only the first two release tags from the end tag are used.
+                    if len(tags) == 2:
+                        break
 
         if len(tags) < 2:
             return None
 
         selected_tag = None
-        if self.major_version_match(tags[0].name, self.tag):
+        if self.major_version_match(tags[0], self.tag):
             selected_tag = tags[1]
         else:
             selected_tag = tags[0]
 
         if self.args.verbose:
-            print(f"info: selected start tag {selected_tag.name}: {selected_tag.commit.sha}")
+            print(f"info: selected start tag {selected_tag}: {self.commit_sha(selected_tag)}")
 
-        return self.select_start_ref(selected_tag.name)
+        return self.select_start_ref(selected_tag)
 
     @staticmethod
     def major_version_match(first_tag: str, second_tag: str) -> bool:
-        major_version_tag_pattern = r"(\d)+."
-        first_tag_major = re.search(major_version_tag_pattern, first_tag)
-        second_tag_major = re.search(major_version_tag_pattern, second_tag)
-        if first_tag_major and second_tag_major and first_tag_major.group(0) == second_tag_major.group(0):
+        first_tag_major = major_version.match(first_tag)
+        second_tag_major = major_version.match(second_tag)
+        if first_tag_major and second_tag_major and first_tag_major.group(1) == second_tag_major.group(1):
             return True
         return False
 
     def select_start_ref(self, start_tag: str) -> str:
         if self.major_version_match(start_tag, self.tag):
-            start_commit = self.repo.get_commit(start_tag).sha
+            start_commit = self.commit_sha(start_tag)
             if self.args.verbose:
                 print(f"info: selected start tag {start_tag} (commit: {start_commit}) "
                       f"has the same major version of the end tag ({self.tag})")
             return start_commit
 
+        # A tag already reachable from the end is its own merge base, no clone needed.
+        # Only status and merge base are read, so keep the commit page minimal.
+        comparison = self.repo.compare(start_tag, self.end, comparison_commits_per_page=1)
+        if comparison.status in ("ahead", "identical"):
+            start_commit = comparison.merge_base_commit.sha
+            if self.args.verbose:
+                print(f"info: selected start tag {start_tag} (commit: {start_commit}) "
+                      f"is an ancestor of the end reference")
+            return start_commit
+
         return self.get_common_ancestor(start_tag)
 
 
@@ -354,15 +642,18 @@ class GenerateMarkdown:
         self.mdFile = MdUtils(
             file_name='CHANGELOG', title='CHANGELOG'
         )
+        # The body is collected here and handed to MdUtils in a single write,
+        # MdUtils renders the title and writes the file.
+        self.lines = []
         if repo.tag:
-            self.mdFile.new_line(
+            self.lines.append(
                 "## Release " +
-                f"[{repo.tag}](https://github.com/{repo.name}/tree/{repo.tag})", wrap_width=0)
+                f"[{repo.tag}](https://github.com/{repo.name}/tree/{repo.tag})")
         else:
-            self.mdFile.new_line(
-                f"[{repo.end}](https://github.com/{repo.name}/tree/{repo.end})", wrap_width=0)
-        self.mdFile.new_line(f"[Full Changelog](https://github.com/{repo.name}"
-                             f"/compare/{repo.start}...{repo.end})", wrap_width=0)
+            self.lines.append(
+                f"[{repo.end}](https://github.com/{repo.name}/tree/{repo.end})")
+        self.lines.append(f"[Full Changelog](https://github.com/{repo.name}"
+                          f"/compare/{repo.start}...{repo.end})")
         sort = self.pull_to_section(repo.commits)
         for section, prs in sort.items():
             self.write_header_pr(section)
@@ -372,62 +663,63 @@ class GenerateMarkdown:
             self.write_header_no_pr()
             for sha, message in repo.other_commits:
                 self.write_no_pr(repo, sha, message)
+        self.mdFile.write('\n'.join(self.lines) + '\n')
         self.mdFile.create_md_file()
 
     def write_header_pr(self, section):
-        self.mdFile.new_line("---")
-        self.mdFile.new_header(level=3, title=section,
-                               add_table_of_contents='n')
-        self.mdFile.new_line(
-            "|Pull Request|Title")
-        self.mdFile.new_line("|:-:|:--")
+        self.lines.extend([
+            "",
+            "---",
+            "",
+            f"### {section}",
+            "",
+            "|Pull Request|Title",
+            "|:-:|:--",
+        ])
 
     def write_header_no_pr(self):
-        self.mdFile.new_line()
-        self.mdFile.new_line(
-            "|Commit|Title")
-        self.mdFile.new_line("|:-:|:--")
+        self.lines.extend([
+            "",
+            "|Commit|Title",
+            "|:-:|:--",
+        ])
 
     def write_pr(self, pr, info):
         imp = ""
         if pr[1]:
             imp = "**BREAKING** "
-        self.mdFile.new_line(
-            f"|[#{pr[0]}]({info['Url']})|{imp}{info['Title']}", wrap_width=0)
+        self.lines.append(
+            f"|[#{pr[0]}]({info['Url']})|{imp}{info['Title']}")
 
     def write_no_pr(self, repo, sha, message):
         url = f"https://github.com/{repo.name}/commit/{sha}"
-        self.mdFile.new_line(
-            f"|[{sha[:8]}]({url})|{message}", wrap_width=0)
+        self.lines.append(
+            f"|[{sha[:8]}]({url})|{message}")
 
     @staticmethod
     def handle_labels(labels) -> Tuple[str, bool]:
-        for section, values in SECTIONS.items():
-            for label in labels:
-                if label in values:
-                    if any(
-                            string in labels for string in [
-                                'breaking',
-                            ]):
-                        return section, True
-                    else:
-                        return section, False
-        return 'Other', False
+        labels_set = frozenset(labels)
+        sections = [LABEL_TO_SECTION[label] for label in labels_set if label in LABEL_TO_SECTION]
+        if not sections:
+            return 'Other', False
+        # The first section in SECTIONS order wins when labels span several.
+        return min(sections, key=SECTION_ORDER.get), 'breaking' in labels_set
 
     def pull_to_section(self, commits) -> dict:
-        sect = copy.deepcopy(SECTIONS)
+        breaking = defaultdict(list)
+        normal = defaultdict(list)
         result = {}
-        for a in sect:
-            sect[a] = []
         for pull, info in commits.items():
             section, important = self.handle_labels(info['labels'])
             if important:
-                sect[section].insert(0, [pull, important])
+                breaking[section].append([pull, important])
             else:
-                sect[section].append([pull, important])
-        for a in sect:
-            if len(sect[a]) > 0:
-                result[a] = sect[a]
+                normal[section].append([pull, important])
+        # SECTIONS only gives the order, sections without PRs never get a bucket.
+        for a in SECTIONS:
+            if a in breaking or a in normal:
+                # Breaking PRs go first, most recently found at the top.
+                result[a] = breaking.get(a, [])[::-1] + normal.get(a, [])
         return result
 
 